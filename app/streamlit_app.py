@@ -1,34 +1,82 @@
 from __future__ import annotations
 
-import json
+from collections import Counter
 from pathlib import Path
 
+import orjson
 import streamlit as st
 
-
-def _read_records(path: str | Path):
-    return json.loads(Path(path).read_text(encoding="utf-8"))["rows"]
-
-
-def _load_twin_states(state_root: Path):
-    rows = []
-    for path in sorted(state_root.glob("state_*.jsonl")):
-        for line in path.read_text(encoding="utf-8").splitlines():
-            if line.strip():
-                rows.append(json.loads(line))
-    return rows
+from twin.io import read_records
+
+FHIR_ROOT = Path("data/synth/fhir_ndjson")
+STATE_ROOT = Path("data/twin_state")
+
+
+# Cached loaders take a file (or directory) fingerprint as an explicit argument so
+# Streamlit's argument hashing invalidates them when the artefacts are rewritten.
+def _mtime_ns(path: str | Path) -> int:
+    return Path(path).stat().st_mtime_ns
+
+
+def _dir_fingerprint(root: Path, pattern: str) -> tuple[tuple[str, int], ...]:
+    return tuple((p.name, p.stat().st_mtime_ns) for p in sorted(root.glob(pattern)))
+
+
+@st.cache_data(show_spinner=False)
+def _read_records(path: str, mtime_ns: int, columns: tuple[str, ...] | None = None):
+    return read_records(path, columns=list(columns) if columns else None)
+
+
+@st.cache_resource(show_spinner=False)
+def _twin_states_by_pid(fingerprint: tuple[tuple[str, int], ...]):
+    """Read every state snapshot once into patient -> snapshots in date order."""
+    states_by_pid: dict[str, list[dict]] = {}
+    for path in sorted(STATE_ROOT.glob("state_*.jsonl")):
+        with path.open("rb") as fh:
+            for line in fh:
+                if line.strip():
+                    state = orjson.loads(line)
+                    states_by_pid.setdefault(state["patient_id"], []).append(state)
+    return states_by_pid
+
+
+@st.cache_resource(show_spinner=False)
+def _fhir_index(fingerprint: tuple[tuple[str, int], ...]):
+    """Stream every NDJSON file once into patient -> event days / sample events."""
+    days_by_pid: dict[str, list[str]] = {}
+    samples_by_pid: dict[str, list[dict]] = {}
+    for resource_file in sorted(FHIR_ROOT.glob("*.ndjson")):
+        with resource_file.open("rb") as fh:
+            for line in fh:
+                if not line.strip():
+                    continue
+                event = orjson.loads(line)
+                subj = event.get("subject", {}).get("reference", "")
+                if not subj:
+                    continue
+                ts = event.get("period", {}).get("start") or event.get("effectiveDateTime") or event.get("authoredOn") or event.get("recordedDate") or event.get("performedDateTime")
+                if not ts:
+                    continue
+                event_pid = subj.rsplit("/", 1)[-1]
+                days_by_pid.setdefault(event_pid, []).append(ts[:10])
+                samples = samples_by_pid.setdefault(event_pid, [])
+                if len(samples) < 6:
+                    samples.append(event)
+    return days_by_pid, samples_by_pid
 
 
 st.set_page_config(page_title="Cardiovascular Digital Twin MVP", layout="wide")
 st.title("Cardiovascular Digital Twin (Research MVP)")
 st.caption("Non-clinical heuristic dashboard. Synthetic data only.")
 
-cohort = _read_records("data/processed/cohort_features.parquet")
+cohort_path = "data/processed/cohort_features.parquet"
+cohort = _read_records(cohort_path, _mtime_ns(cohort_path), ("patient_id",))
 patients = [row["patient_id"] for row in cohort]
 pid = st.selectbox("Select patient", patients)
 
-wearables = _read_records(f"data/synth/wearables/{pid}.parquet")
-patient_states = [r for r in _load_twin_states(Path("data/twin_state")) if r["patient_id"] == pid]
+wearable_path = f"data/synth/wearables/{pid}.parquet"
+wearables = _read_records(wearable_path, _mtime_ns(wearable_path))
+patient_states = _twin_states_by_pid(_dir_fingerprint(STATE_ROOT, "state_*.jsonl")).get(pid, [])
 
 col1, col2 = st.columns(2)
 with col1:
@@ -52,18 +100,9 @@ with col2:
         st.info("No wearable data")
 
 st.subheader("EHR event timeline")
-counts = {}
-sample_events = []
-for resource_file in Path("data/synth/fhir_ndjson").glob("*.ndjson"):
-    for line in resource_file.read_text(encoding="utf-8").splitlines():
-        event = json.loads(line)
-        subj = event.get("subject", {}).get("reference", "")
-        if subj.endswith(pid):
-            ts = event.get("period", {}).get("start") or event.get("effectiveDateTime") or event.get("authoredOn") or event.get("recordedDate") or event.get("performedDateTime")
-            day = ts[:10]
-            counts[day] = counts.get(day, 0) + 1
-            if len(sample_events) < 6:
-                sample_events.append(event)
+days_by_pid, samples_by_pid = _fhir_index(_dir_fingerprint(FHIR_ROOT, "*.ndjson"))
+counts = Counter(days_by_pid.get(pid, []))
+sample_events = samples_by_pid.get(pid, [])
 
 if counts:
     ordered = sorted(counts.items())
@@ -1,11 +1,12 @@
 from __future__ import annotations
 
 import random
-from dataclasses import asdict, dataclass, field
+from collections import Counter
+from dataclasses import dataclass, field
 from typing import Any
 
 
-@dataclass
+@dataclass(slots=True)
 class Event:
     step: int
     event_type: str
@@ -127,6 +128,9 @@ class InsiderModel:
         self.step_idx = 0
         self.events: list[dict[str, Any]] = []
         self.action_events: list[Event] = []
+        # Per-step malicious-event tallies, maintained by emit_action for _run_monitors.
+        self._suspicious_count = 0
+        self._malicious_actor_counts: Counter[int] = Counter()
         scenarios = ["acct_takeover", "stealth", "staging_exfil", "exfil", "email_only"]
         self.attackers = [MaliciousInsider(i, s, self.rng) for i, s in enumerate(scenarios)]
         self.traffic_twin = TrafficTwin(service="traffic", degrade_threshold=0.25)
@@ -137,7 +141,22 @@ class InsiderModel:
     def emit_action(self, event: Event) -> None:
         self._tag_phase(event)
         self.action_events.append(event)
-        self.events.append(asdict(event))
+        self.events.append(
+            {
+                "step": event.step,
+                "event_type": event.event_type,
+                "actor_id": event.actor_id,
+                "resource": event.resource,
+                "action": event.action,
+                "label": event.label,
+                "scenario": event.scenario,
+                "phase": event.phase,
+                "meta": dict(event.meta),
+            }
+        )
+        if event.label == "malicious" and event.actor_id >= 0:
+            self._suspicious_count += 1
+            self._malicious_actor_counts[event.actor_id] += 1
 
     def _emit_benign_background(self) -> None:
         for actor_id in range(5, 12):
@@ -145,14 +164,14 @@ class InsiderModel:
                 self.emit_action(Event(self.step_idx, "auth", actor_id, "vpn", "login", "benign"))
 
     def _run_monitors(self) -> None:
-        suspicious = sum(1 for e in self.action_events if e.label == "malicious" and e.actor_id >= 0)
-        if suspicious >= self.threshold:
-            suspects = sorted({e.actor_id for e in self.action_events if e.label == "malicious" and e.actor_id >= 0})
-            for a in suspects:
+        if self._suspicious_count >= self.threshold:
+            for a in sorted(self._malicious_actor_counts):
                 self.emit_action(Event(self.step_idx, "alert_confirmed", a, "siem", "confirm", "benign"))
 
     def step(self) -> None:
         self.action_events = []
+        self._suspicious_count = 0
+        self._malicious_actor_counts.clear()
         self._emit_benign_background()
         for attacker in self.attackers:
             attacker.act(self)
@@ -3,16 +3,24 @@ from __future__ import annotations
 import csv
 import hashlib
 import re
+from collections import Counter
 from pathlib import Path
 from typing import Any
 
+import numpy as np
+
 ROOT_CSV_FALLBACK = Path("heart_disease_uci.csv")
 RAW_CSV_PRIMARY = Path("data/raw/uci_heart/heart_disease_uci.csv")
+MISSING_TOKENS = frozenset({"", "?", "NA", "na"})
+_MISSING = object()
+
+_NON_ALNUM = re.compile(r"[^0-9a-zA-Z]+")
+_MULTI_UNDERSCORE = re.compile(r"_+")
 
 
 def normalize_column_name(name: str) -> str:
-    cleaned = re.sub(r"[^0-9a-zA-Z]+", "_", name.strip().lower())
-    return re.sub(r"_+", "_", cleaned).strip("_")
+    cleaned = _NON_ALNUM.sub("_", name.strip().lower())
+    return _MULTI_UNDERSCORE.sub("_", cleaned).strip("_")
 
 
 def resolve_data_path(path: str | None = None) -> Path:
@@ -39,26 +47,15 @@ def _to_number(value: str) -> float | None:
 
 
 def _mode(values: list[str]) -> str:
-    counts: dict[str, int] = {}
-    for value in values:
-        counts[value] = counts.get(value, 0) + 1
-    return max(counts.items(), key=lambda pair: pair[1])[0] if counts else "unknown"
+    return Counter(values).most_common(1)[0][0] if values else "unknown"
 
 
 def _median(values: list[float]) -> float:
-    if not values:
-        return 0.0
-    ordered = sorted(values)
-    mid = len(ordered) // 2
-    if len(ordered) % 2 == 1:
-        return ordered[mid]
-    return (ordered[mid - 1] + ordered[mid]) / 2.0
-
-
-def _stable_patient_id(row: dict[str, Any], target_column: str | None) -> str:
-    serial = "|".join(
-        f"{k}={row[k]}" for k in sorted(row.keys()) if k != target_column
-    )
+    return float(np.median(values)) if values else 0.0
+
+
+def _stable_patient_id(features: dict[str, Any], sorted_columns: list[str]) -> str:
+    serial = "|".join([f"{k}={features[k]}" for k in sorted_columns])
     digest = hashlib.sha256(serial.encode("utf-8")).hexdigest()[:16]
     return f"pid_{digest}"
 
@@ -73,53 +70,63 @@ def load_uci_dataset(path: str | None = None) -> tuple[list[dict[str, Any]], lis
 
     data_path = resolve_data_path(path)
     with data_path.open(newline="", encoding="utf-8") as f:
-        reader = csv.DictReader(f)
-        if reader.fieldnames is None:
+        reader = csv.reader(f)
+        header = next(reader, None)
+        if header is None:
             raise ValueError("CSV has no header row.")
-        rows = [
-            {normalize_column_name(k): (v.strip() if isinstance(v, str) else v) for k, v in row.items()}
-            for row in reader
-        ]
+        columns = [normalize_column_name(name) for name in header]
+        rows = [dict(zip(columns, (value.strip() for value in record))) for record in reader if record]
 
     if not rows:
         raise ValueError("Dataset is empty.")
 
-    target_column = "target" if "target" in rows[0] else ("num" if "num" in rows[0] else None)
+    header_columns = list(dict.fromkeys(columns))
+    target_column = "target" if "target" in header_columns else ("num" if "num" in header_columns else None)
     if target_column is None:
         raise ValueError("Expected target column 'target' or 'num'.")
 
-    feature_columns = [col for col in rows[0].keys() if col != target_column]
-    numeric_flags: dict[str, bool] = {}
-    for col in feature_columns:
-        numeric_flags[col] = all(
-            (_to_number(row.get(col, "")) is not None) or str(row.get(col, "")).strip() in {"", "?", "NA", "na"}
-            for row in rows
-        )
-
-    numeric_values: dict[str, list[float]] = {col: [] for col in feature_columns if numeric_flags[col]}
-    categorical_values: dict[str, list[str]] = {col: [] for col in feature_columns if not numeric_flags[col]}
+    feature_columns = [col for col in header_columns if col != target_column]
+    # Single pass: parse each cell once, collecting candidate fill values for both
+    # column kinds and demoting a column to categorical on its first non-numeric value.
+    numeric_flags: dict[str, bool] = {col: True for col in feature_columns}
+    numeric_values: dict[str, list[float]] = {col: [] for col in feature_columns}
+    categorical_values: dict[str, list[str]] = {col: [] for col in feature_columns}
 
+    # Parsed cells are kept per row (number, raw string, or _MISSING) so the
+    # feature build below never re-parses a value.
+    parsed_rows: list[list[Any]] = []
     for row in rows:
+        cells: list[Any] = []
         for col in feature_columns:
-            raw = str(row.get(col, ""))
+            raw = row.get(col, "")
+            if raw in MISSING_TOKENS:
+                cells.append(_MISSING)
+                continue
+            categorical_values[col].append(raw)
             num = _to_number(raw)
-            if numeric_flags[col]:
-                if num is not None:
-                    numeric_values[col].append(num)
+            if num is not None:
+                numeric_values[col].append(num)
+                cells.append(num)
             else:
-                cleaned = raw.strip()
-                if cleaned and cleaned not in {"?", "NA", "na"}:
-                    categorical_values[col].append(cleaned)
+                numeric_flags[col] = False
+                cells.append(raw)
+        parsed_rows.append(cells)
 
-    numeric_fill = {col: _median(vals) for col, vals in numeric_values.items()}
-    categorical_fill = {col: _mode(vals) for col, vals in categorical_values.items()}
+    fill_values: dict[str, Any] = {
+        col: _median(numeric_values[col]) if numeric_flags[col] else _mode(categorical_values[col])
+        for col in feature_columns
+    }
+    column_plan = [(j, col, numeric_flags[col], fill_values[col]) for j, col in enumerate(feature_columns)]
+
+    # The ID hashes the cleaned feature values only, in sorted column order.
+    id_columns = sorted(feature_columns)
 
     X: list[dict[str, Any]] = []
     y: list[int] = []
     patient_ids: list[str] = []
 
-    for row in rows:
-        raw_target = _to_number(str(row.get(target_column, "")))
+    for row, cells in zip(rows, parsed_rows):
+        raw_target = _to_number(row.get(target_column, ""))
         if raw_target is None:
             raise ValueError("Target contains missing/non-numeric values.")
 
@@ -129,16 +136,17 @@ def load_uci_dataset(path: str | None = None) -> tuple[list[dict[str, Any]], lis
         y.append(mapped_target)
 
         features: dict[str, Any] = {}
-        for col in feature_columns:
-            raw = str(row.get(col, ""))
-            num = _to_number(raw)
-            if numeric_flags[col]:
-                features[col] = num if num is not None else numeric_fill[col]
+        for j, col, is_numeric, fill in column_plan:
+            cell = cells[j]
+            if cell is _MISSING:
+                features[col] = fill
+            elif is_numeric:
+                features[col] = cell
             else:
-                cleaned = raw.strip()
-                features[col] = cleaned if cleaned and cleaned not in {"?", "NA", "na"} else categorical_fill[col]
+                # Categorical columns keep the raw text even where it parsed as a number.
+                features[col] = row[col]
 
-        pid = _stable_patient_id({**features, target_column: mapped_target}, target_column)
+        pid = _stable_patient_id(features, id_columns)
         patient_ids.append(pid)
         X.append(features)
 
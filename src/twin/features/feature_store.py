@@ -1,9 +1,12 @@
 from __future__ import annotations
 
-import json
 from pathlib import Path
 from typing import Any
 
+from twin.io import write_records
+
+_NAME_TO_TYPE: dict[str, type] = {t.__name__: t for t in (str, int, float, bool, type(None))}
+
 
 def infer_schema(rows: list[dict[str, Any]]) -> dict[str, str]:
     if not rows:
@@ -24,32 +27,40 @@ def validate_schema(rows: list[dict[str, Any]], expected_schema: dict[str, str])
     if actual_columns != expected_columns:
         raise ValueError(f"Schema columns mismatch: expected={expected_columns} actual={actual_columns}")
 
-    for col, expected_type in expected_schema.items():
-        for row in rows:
-            actual_type = type(row[col]).__name__
-            if actual_type != expected_type:
-                raise ValueError(f"Schema dtype mismatch for {col}: expected={expected_type} actual={actual_type}")
+    # Compare type objects by identity in one sweep over the rows; names without a
+    # known builtin type fall back to a name comparison.
+    expected_types = [(col, _NAME_TO_TYPE.get(name), name) for col, name in expected_schema.items()]
+    for row in rows:
+        for col, expected_cls, expected_type in expected_types:
+            actual_cls = type(row[col])
+            if actual_cls is not expected_cls and actual_cls.__name__ != expected_type:
+                raise ValueError(
+                    f"Schema dtype mismatch for {col}: expected={expected_type} actual={actual_cls.__name__}"
+                )
 
 
 def persist_feature_store(
-    X: list[dict[str, Any]], y: list[int], patient_ids: list[str], output_path: str | Path = "data/processed/cohort_features.parquet"
+    X: list[dict[str, Any]],
+    y: list[int],
+    patient_ids: list[str],
+    output_path: str | Path = "data/processed/cohort_features.parquet",
+    validate: bool = False,
 ) -> Path:
+    """Write cohort feature rows to Parquet.
+
+    ``validate`` re-checks every row against the schema inferred from the first row.
+    It is off by default: rows from ``load_uci_dataset`` are homogeneous by
+    construction, and Arrow conversion already rejects str/number mixes in a column.
+    """
+
     if not (len(X) == len(y) == len(patient_ids)):
         raise ValueError("Feature, target, and patient IDs must have matching lengths.")
 
-    output = Path(output_path)
-    output.parent.mkdir(parents=True, exist_ok=True)
-
     rows = []
     for features, label, pid in zip(X, y, patient_ids):
         rows.append({"patient_id": pid, **features, "target": int(label)})
 
-    schema = infer_schema(rows)
-    validate_schema(rows, schema)
-
-    # Stored as JSON records at a parquet-designated path to keep dependencies minimal.
-    # Downstream consumers in this MVP read the serialized records through Python.
-    with output.open("w", encoding="utf-8") as f:
-        json.dump({"schema": schema, "rows": rows}, f)
+    if validate:
+        validate_schema(rows, infer_schema(rows))
 
-    return output
+    return write_records(output_path, rows)
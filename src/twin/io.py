@@ -0,0 +1,38 @@
+from __future__ import annotations
+
+from pathlib import Path
+from typing import Any
+
+import orjson
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+PARQUET_MAGIC = b"PAR1"
+
+
+def _is_parquet(path: Path) -> bool:
+    with path.open("rb") as f:
+        return f.read(len(PARQUET_MAGIC)) == PARQUET_MAGIC
+
+
+def read_records(path: str | Path, columns: list[str] | None = None) -> list[dict[str, Any]]:
+    """Read row records from a Parquet file.
+
+    Legacy artefacts stored as ``{"schema", "rows"}`` JSON (including JSON written
+    at a ``.parquet`` path) are still accepted.
+    """
+
+    path = Path(path)
+    if path.suffix == ".json" or not _is_parquet(path):
+        rows = orjson.loads(path.read_bytes())["rows"]
+        if columns is None:
+            return rows
+        return [{col: row[col] for col in columns} for row in rows]
+    return pq.read_table(path, columns=columns).to_pylist()
+
+
+def write_records(path: str | Path, rows: list[dict[str, Any]]) -> Path:
+    output = Path(path)
+    output.parent.mkdir(parents=True, exist_ok=True)
+    pq.write_table(pa.Table.from_pylist(rows), output, compression="zstd")
+    return output
@@ -1,11 +1,12 @@
 from __future__ import annotations
 
 import json
-import math
 import random
 from pathlib import Path
 from typing import Any
 
+import numpy as np
+
 
 def _stratified_split(y: list[int], test_size: float = 0.2, seed: int = 42) -> tuple[list[int], list[int]]:
     rng = random.Random(seed)
@@ -34,7 +35,7 @@ def _build_encoder(X: list[dict[str, Any]]) -> tuple[list[str], dict[str, list[s
     return numeric_cols, categorical_levels
 
 
-def _encode_rows(X: list[dict[str, Any]], numeric_cols: list[str], categorical_levels: dict[str, list[str]]) -> list[list[float]]:
+def _encode_rows(X: list[dict[str, Any]], numeric_cols: list[str], categorical_levels: dict[str, list[str]]) -> np.ndarray:
     matrix: list[list[float]] = []
     for row in X:
         vec: list[float] = [1.0]
@@ -44,46 +45,37 @@ def _encode_rows(X: list[dict[str, Any]], numeric_cols: list[str], categorical_l
             value = str(row[col])
             vec.extend([1.0 if value == level else 0.0 for level in levels])
         matrix.append(vec)
-    return matrix
+    return np.asarray(matrix, dtype=np.float64)
 
 
-def _sigmoid(x: float) -> float:
-    if x >= 0:
-        z = math.exp(-x)
-        return 1 / (1 + z)
-    z = math.exp(x)
-    return z / (1 + z)
+def _sigmoid(x: np.ndarray) -> np.ndarray:
+    z = np.exp(-np.abs(x))
+    return np.where(x >= 0, 1 / (1 + z), z / (1 + z))
 
 
-def _fit_logistic(X: list[list[float]], y: list[int], epochs: int = 300, lr: float = 0.001) -> list[float]:
-    weights = [0.0 for _ in range(len(X[0]))]
+def _fit_logistic(X: np.ndarray, y: np.ndarray, epochs: int = 300, lr: float = 0.001) -> np.ndarray:
+    weights = np.zeros(X.shape[1], dtype=np.float64)
+    n = float(len(X))
     for _ in range(epochs):
-        grad = [0.0 for _ in weights]
-        for row, target in zip(X, y):
-            pred = _sigmoid(sum(w * x for w, x in zip(weights, row)))
-            err = pred - target
-            for j, xj in enumerate(row):
-                grad[j] += err * xj
-        n = float(len(X))
-        for j in range(len(weights)):
-            weights[j] -= lr * grad[j] / n
+        err = _sigmoid(X @ weights) - y
+        weights -= lr * (X.T @ err) / n
     return weights
 
 
-def _predict_proba(X: list[list[float]], w: list[float]) -> list[float]:
-    return [_sigmoid(sum(wj * xj for wj, xj in zip(w, row))) for row in X]
+def _predict_proba(X: np.ndarray, w: np.ndarray) -> np.ndarray:
+    return _sigmoid(X @ w)
 
 
-def _accuracy(y: list[int], p: list[float]) -> float:
-    preds = [1 if s >= 0.5 else 0 for s in p]
-    return sum(int(a == b) for a, b in zip(y, preds)) / len(y)
+def _accuracy(y: np.ndarray, p: np.ndarray) -> float:
+    return float(np.mean((p >= 0.5) == (y == 1)))
 
 
-def _f1(y: list[int], p: list[float]) -> float:
-    preds = [1 if s >= 0.5 else 0 for s in p]
-    tp = sum(1 for yt, yp in zip(y, preds) if yt == yp == 1)
-    fp = sum(1 for yt, yp in zip(y, preds) if yt == 0 and yp == 1)
-    fn = sum(1 for yt, yp in zip(y, preds) if yt == 1 and yp == 0)
+def _f1(y: np.ndarray, p: np.ndarray) -> float:
+    preds = p >= 0.5
+    actual = y == 1
+    tp = int(np.sum(preds & actual))
+    fp = int(np.sum(preds & ~actual))
+    fn = int(np.sum(~preds & actual))
     if tp == 0:
         return 0.0
     precision = tp / (tp + fp)
@@ -91,54 +83,35 @@ def _f1(y: list[int], p: list[float]) -> float:
     return 2 * precision * recall / (precision + recall)
 
 
-def _brier(y: list[int], p: list[float]) -> float:
-    return sum((yt - pt) ** 2 for yt, pt in zip(y, p)) / len(y)
+def _brier(y: np.ndarray, p: np.ndarray) -> float:
+    return float(np.mean((y - p) ** 2))
 
 
-def _auroc(y: list[int], p: list[float]) -> float:
-    pairs = sorted(zip(p, y), key=lambda x: x[0], reverse=True)
-    pos = sum(y)
+def _auroc(y: np.ndarray, p: np.ndarray) -> float:
+    positive = y == 1
+    pos = int(np.sum(positive))
     neg = len(y) - pos
     if pos == 0 or neg == 0:
         return 0.0
 
-    tp = 0
-    fp = 0
-    prev_tpr = 0.0
-    prev_fpr = 0.0
-    area = 0.0
-    for _, label in pairs:
-        if label == 1:
-            tp += 1
-        else:
-            fp += 1
-        tpr = tp / pos
-        fpr = fp / neg
-        area += (fpr - prev_fpr) * (tpr + prev_tpr) / 2
-        prev_tpr, prev_fpr = tpr, fpr
-    return area
+    # Rank-sum (Mann-Whitney) identity; tied scores share their average rank.
+    _, inverse, counts = np.unique(p, return_inverse=True, return_counts=True)
+    ranks = (np.cumsum(counts) - (counts - 1) / 2.0)[inverse]
+    return float((ranks[positive].sum() - pos * (pos + 1) / 2.0) / (pos * neg))
 
 
-def _auprc(y: list[int], p: list[float]) -> float:
-    pairs = sorted(zip(p, y), key=lambda x: x[0], reverse=True)
-    pos = sum(y)
+def _auprc(y: np.ndarray, p: np.ndarray) -> float:
+    pos = int(np.sum(y == 1))
     if pos == 0:
         return 0.0
 
-    tp = 0
-    fp = 0
-    prev_recall = 0.0
-    area = 0.0
-    for _, label in pairs:
-        if label == 1:
-            tp += 1
-        else:
-            fp += 1
-        recall = tp / pos
-        precision = tp / (tp + fp)
-        area += (recall - prev_recall) * precision
-        prev_recall = recall
-    return area
+    order = np.argsort(-p, kind="stable")
+    hits = y[order] == 1
+    tp = np.cumsum(hits)
+    fp = np.cumsum(~hits)
+    precision = tp / (tp + fp)
+    recall = tp / pos
+    return float(np.sum(np.diff(recall, prepend=0.0) * precision))
 
 
 def train_and_evaluate(X: list[dict[str, Any]], y: list[int], output_metrics: str | Path = "reports/metrics.json") -> dict[str, float]:
@@ -147,9 +120,9 @@ def train_and_evaluate(X: list[dict[str, Any]], y: list[int], output_metrics: st
 
     train_idx, test_idx = _stratified_split(y)
     X_train = [X[i] for i in train_idx]
-    y_train = [y[i] for i in train_idx]
+    y_train = np.asarray([y[i] for i in train_idx], dtype=np.float64)
     X_test = [X[i] for i in test_idx]
-    y_test = [y[i] for i in test_idx]
+    y_test = np.asarray([y[i] for i in test_idx], dtype=np.float64)
 
     numeric_cols, categorical_levels = _build_encoder(X_train)
     Z_train = _encode_rows(X_train, numeric_cols, categorical_levels)
@@ -1,3 +1,3 @@
-from twin.sim.hemodynamics_stub import simulate_hemodynamics_stub
+from twin.sim.hemodynamics_stub import simulate_hemodynamics_stub, simulate_hemodynamics_stub_vec
 
-__all__ = ["simulate_hemodynamics_stub"]
+__all__ = ["simulate_hemodynamics_stub", "simulate_hemodynamics_stub_vec"]
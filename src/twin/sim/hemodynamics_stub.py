@@ -1,15 +1,29 @@
 from __future__ import annotations
 
+import numpy as np
+
 # Placeholder only for MVP research workflow. Not physiologically validated.
 
 
-def simulate_hemodynamics_stub(age: float, hr: float, sbp: float, dbp: float) -> dict[str, float]:
+def simulate_hemodynamics_stub_vec(
+    age: np.ndarray, hr: np.ndarray, sbp: np.ndarray, dbp: np.ndarray
+) -> dict[str, np.ndarray]:
+    """Array version of ``simulate_hemodynamics_stub``; outputs are left unrounded."""
     map_est = dbp + (sbp - dbp) / 3.0
-    pulse_pressure = max(sbp - dbp, 1.0)
-    compliance_proxy = max(0.1, (1.0 / pulse_pressure) * (70.0 / max(age, 18.0)))
+    pulse_pressure = np.maximum(sbp - dbp, 1.0)
+    compliance_proxy = np.maximum(0.1, (1.0 / pulse_pressure) * (70.0 / np.maximum(age, 18.0)))
     cardiac_strain_proxy = (hr / 60.0) * (map_est / 93.0)
     return {
-        "map_estimate": round(map_est, 3),
-        "compliance_proxy": round(compliance_proxy, 5),
-        "cardiac_strain_proxy": round(cardiac_strain_proxy, 5),
+        "map_estimate": map_est,
+        "compliance_proxy": compliance_proxy,
+        "cardiac_strain_proxy": cardiac_strain_proxy,
+    }
+
+
+def simulate_hemodynamics_stub(age: float, hr: float, sbp: float, dbp: float) -> dict[str, float]:
+    out = simulate_hemodynamics_stub_vec(age, hr, sbp, dbp)
+    return {
+        "map_estimate": round(float(out["map_estimate"]), 3),
+        "compliance_proxy": round(float(out["compliance_proxy"]), 5),
+        "cardiac_strain_proxy": round(float(out["cardiac_strain_proxy"]), 5),
     }
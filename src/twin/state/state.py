@@ -1,10 +1,11 @@
 from __future__ import annotations
 
-import json
 from dataclasses import asdict, dataclass, field
 from datetime import datetime, timezone
 from typing import Any
 
+import orjson
+
 
 @dataclass
 class TwinState:
@@ -15,8 +16,8 @@ class TwinState:
     metadata: dict[str, Any] | None = None
 
     def to_json(self) -> str:
-        return json.dumps(asdict(self), sort_keys=True)
+        return orjson.dumps(asdict(self), option=orjson.OPT_SORT_KEYS).decode()
 
     @classmethod
     def from_json(cls, payload: str) -> "TwinState":
-        return cls(**json.loads(payload))
+        return cls(**orjson.loads(payload))
@@ -1,11 +1,16 @@
 from __future__ import annotations
 
-import json
-import random
+from collections.abc import Iterable, Iterator
+from contextlib import ExitStack
 from datetime import UTC, datetime, timedelta
+from functools import partial
+from multiprocessing import Pool
 from pathlib import Path
 from typing import Any
 
+import numpy as np
+import orjson
+
 from twin.data.uci_loader import load_uci_dataset
 
 
@@ -24,7 +29,7 @@ def _risk_from_features(features: dict[str, Any], label: int) -> float:
     return _clamp(risk, 0.01, 0.98)
 
 
-def _base_metrics(features: dict[str, Any], label: int, rng: random.Random) -> dict[str, float]:
+def _base_metrics(features: dict[str, Any], label: int, rng: np.random.Generator) -> dict[str, float]:
     age = float(features.get("age", 55.0))
     bp = float(features.get("trestbps", 130.0))
     chol = float(features.get("chol", 220.0))
@@ -43,13 +48,231 @@ def _base_metrics(features: dict[str, Any], label: int, rng: random.Random) -> d
     }
 
 
-def _write_json_records(path: Path, rows: list[dict[str, Any]]) -> None:
+WRITE_BUFFER_BYTES = 1 << 20
+
+# Column types written into each synth artefact's schema header.
+WEARABLE_SCHEMA = {
+    "patient_id": "str",
+    "timestamp": "str",
+    "hr": "float",
+    "sbp": "float",
+    "dbp": "float",
+    "steps": "int",
+    "sleep_duration_h": "float",
+    "sleep_efficiency": "float",
+}
+IMAGING_SCHEMA = {
+    "patient_id": "str",
+    "lvef": "float",
+    "lvedv": "float",
+    "lvesv": "float",
+    "wall_thickness": "float",
+    "cac_score_proxy": "int",
+}
+RISK_FACTOR_SCHEMA = {
+    "patient_id": "str",
+    "apoe4_carrier": "int",
+    "family_history_cvd": "int",
+    "polygenic_risk_decile": "int",
+}
+
+
+def _iter_json_records(rows: Iterable[dict[str, Any]], schema: dict[str, str]) -> Iterator[bytes]:
+    yield b'{"schema":'
+    yield orjson.dumps(schema)
+    yield b',"rows":['
+    for i, row in enumerate(rows):
+        if i:
+            yield b","
+        yield orjson.dumps(row)
+    yield b"]}"
+
+
+def _encode_json_records(rows: Iterable[dict[str, Any]], schema: dict[str, str]) -> bytes:
+    return b"".join(_iter_json_records(rows, schema))
+
+
+def _write_json_records(path: Path, rows: Iterable[dict[str, Any]], schema: dict[str, str]) -> None:
     path.parent.mkdir(parents=True, exist_ok=True)
-    payload = {"schema": {k: type(v).__name__ for k, v in rows[0].items()} if rows else {}, "rows": rows}
-    path.write_text(json.dumps(payload), encoding="utf-8")
+    # Stream row by row through a large buffer; rows may be a generator, so the
+    # full record list never has to exist in memory.
+    with path.open("wb", buffering=WRITE_BUFFER_BYTES) as f:
+        f.writelines(_iter_json_records(rows, schema))
+
+
+RESOURCE_TYPES = ["Encounter", "Condition", "MedicationRequest", "Observation", "Procedure"]
+
+
+def _build_calendar(now: datetime, days: int) -> dict[str, Any]:
+    """Day-level values shared by every patient."""
+    day_objs = [now - timedelta(days=(days - 1 - day_offset)) for day_offset in range(days)]
+    weekday = np.array([day.weekday() for day in day_objs])
+    return {
+        "offsets": np.arange(days),
+        "iso": [day.isoformat() for day in day_objs],
+        "date": [day.date().isoformat() for day in day_objs],
+        "circadian": np.where(weekday < 5, 1.12, 0.88),
+        "weekend_steps": np.where(weekday > 4, 0.9, 1.0),
+    }
+
+
+def _generate_patient(
+    calendar: dict[str, Any],
+    task: tuple[int, str, dict[str, Any], int, int, int],
+) -> tuple[dict[str, Any], dict[str, Any], bytes, dict[str, bytes]]:
+    """Generate one patient's synthetic data.
+
+    Returns the imaging row, risk-factor row, the encoded wearable file and the
+    FHIR resources as encoded NDJSON chunks keyed by resource type. Module-level
+    so it can run in a worker process; the caller does all file writes.
+    """
+
+    idx, pid, feat, label, seed, days = task
+    resource_rows: dict[str, list[dict[str, Any]]] = {r: [] for r in RESOURCE_TYPES}
+    offsets, day_iso, day_date = calendar["offsets"], calendar["iso"], calendar["date"]
+    rng = np.random.default_rng(seed * 10_000 + idx)
+    base = _base_metrics(feat, label, rng)
+
+    imaging_row = {
+        "patient_id": pid,
+        "lvef": round(_clamp(65 - base["risk"] * 28 + rng.uniform(-5, 4), 20, 75), 1),
+        "lvedv": round(_clamp(110 + base["risk"] * 55 + rng.uniform(-12, 12), 65, 260), 1),
+        "lvesv": round(_clamp(45 + base["risk"] * 40 + rng.uniform(-9, 10), 20, 180), 1),
+        "wall_thickness": round(_clamp(9 + base["risk"] * 5 + rng.uniform(-1.2, 1.2), 6, 18), 2),
+        "cac_score_proxy": int(_clamp(base["risk"] * 280 + rng.uniform(0, 140), 0, 700)),
+    }
+
+    risk_row = {
+        "patient_id": pid,
+        "apoe4_carrier": int(rng.random() < (0.1 + 0.2 * base["risk"])),
+        "family_history_cvd": int(rng.random() < (0.2 + 0.5 * base["risk"])),
+        "polygenic_risk_decile": int(_clamp(round(base["risk"] * 10 + rng.uniform(-1, 1)), 1, 10)),
+    }
+
+    # All of a patient's daily draws are sampled as whole-series arrays.
+    circadian = calendar["circadian"]
+    missing_day = rng.random(days) < 0.08
+    hr = np.clip(base["hr"] * circadian + rng.uniform(-7, 7, days), 40, 160)
+    sbp = np.clip(base["sbp"] + rng.uniform(-10, 10, days), 85, 220)
+    dbp = np.clip(base["dbp"] + rng.uniform(-8, 8, days), 45, 140)
+    steps = np.clip(base["steps"] * (0.75 + 0.35 * rng.random(days)) * calendar["weekend_steps"], 0, 25000)
+    sleep_h = np.clip(base["sleep_h"] + rng.uniform(-1.2, 1.0, days), 3.5, 10.5)
+    sleep_eff = np.clip(0.88 - base["risk"] * 0.13 + rng.uniform(-0.08, 0.05, days), 0.55, 0.98)
+    hr_missing = missing_day & (rng.random(days) < 0.5)
+    sbp_missing = missing_day & (rng.random(days) < 0.6)
+    dbp_missing = missing_day & (rng.random(days) < 0.6)
+    sleep_h_missing = missing_day & (rng.random(days) < 0.5)
+    sleep_eff_missing = missing_day & (rng.random(days) < 0.5)
+
+    encounter_days = rng.random(days) < (0.03 + base["risk"] * 0.08)
+    emergency = rng.random(days) >= 0.8
+    observation_days = (offsets % 30 == 0) | (rng.random(days) < 0.04)
+    medication_days = (offsets % 45 == 0) & (rng.random(days) < 0.75)
+    condition_days = (offsets % 60 == 0) & (rng.random(days) < (0.35 + base["risk"] * 0.4))
+    procedure_days = (offsets % 90 == 0) & (rng.random(days) < (0.2 + base["risk"] * 0.3))
+
+    # Round whole columns in place, then swap in None for missing readings while
+    # converting to Python lists.
+    for arr, decimals in ((hr, 1), (sbp, 1), (dbp, 1), (sleep_h, 2), (sleep_eff, 3)):
+        np.round(arr, decimals, out=arr)
+    hr_l, sbp_l, dbp_l = hr.tolist(), sbp.tolist(), dbp.tolist()
+    columns = (
+        np.where(hr_missing, None, hr).tolist(),
+        np.where(sbp_missing, None, sbp).tolist(),
+        np.where(dbp_missing, None, dbp).tolist(),
+        np.where(missing_day, None, steps.astype(np.int64)).tolist(),
+        np.where(sleep_h_missing, None, sleep_h).tolist(),
+        np.where(sleep_eff_missing, None, sleep_eff).tolist(),
+    )
+    wearable_rows = (
+        {
+            "patient_id": pid,
+            "timestamp": timestamp,
+            "hr": hr_v,
+            "sbp": sbp_v,
+            "dbp": dbp_v,
+            "steps": steps_v,
+            "sleep_duration_h": sleep_h_v,
+            "sleep_efficiency": sleep_eff_v,
+        }
+        for timestamp, hr_v, sbp_v, dbp_v, steps_v, sleep_h_v, sleep_eff_v in zip(day_iso, *columns)
+    )
+    wearable_bytes = _encode_json_records(wearable_rows, WEARABLE_SCHEMA)
+
+    for d in np.flatnonzero(encounter_days).tolist():
+        resource_rows["Encounter"].append(
+            {
+                "resourceType": "Encounter",
+                "id": f"enc-{pid}-{day_date[d]}",
+                "subject": {"reference": f"Patient/{pid}"},
+                "period": {"start": day_iso[d]},
+                "class": {"code": "emergency" if emergency[d] else "outpatient"},
+            }
+        )
+
+    for d in np.flatnonzero(observation_days).tolist():
+        resource_rows["Observation"].append(
+            {
+                "resourceType": "Observation",
+                "id": f"obs-{pid}-{day_date[d]}",
+                "subject": {"reference": f"Patient/{pid}"},
+                "effectiveDateTime": day_iso[d],
+                "code": {"coding": [{"system": "placeholder-lab", "code": "bp_panel"}]},
+                "component": [
+                    {"code": {"text": "SBP"}, "valueQuantity": {"value": sbp_l[d]}},
+                    {"code": {"text": "DBP"}, "valueQuantity": {"value": dbp_l[d]}},
+                    {"code": {"text": "HR"}, "valueQuantity": {"value": hr_l[d]}},
+                ],
+            }
+        )
+
+    for d in np.flatnonzero(medication_days).tolist():
+        resource_rows["MedicationRequest"].append(
+            {
+                "resourceType": "MedicationRequest",
+                "id": f"med-{pid}-{day_date[d]}",
+                "subject": {"reference": f"Patient/{pid}"},
+                "authoredOn": day_iso[d],
+                "medicationCodeableConcept": {"coding": [{"system": "placeholder-rx", "code": "statin_or_bp_agent"}]},
+                "status": "active",
+            }
+        )
 
+    for d in np.flatnonzero(condition_days).tolist():
+        resource_rows["Condition"].append(
+            {
+                "resourceType": "Condition",
+                "id": f"cond-{pid}-{day_date[d]}",
+                "subject": {"reference": f"Patient/{pid}"},
+                "recordedDate": day_iso[d],
+                "code": {"coding": [{"system": "placeholder-cond", "code": "cvd_risk_state"}]},
+                "clinicalStatus": {"text": "active"},
+            }
+        )
 
-def generate_synthetic_data(seed: int = 42, data_path: str | None = None, days: int = 180, output_root: str | Path = "data/synth") -> dict[str, Path]:
+    for d in np.flatnonzero(procedure_days).tolist():
+        resource_rows["Procedure"].append(
+            {
+                "resourceType": "Procedure",
+                "id": f"proc-{pid}-{day_date[d]}",
+                "subject": {"reference": f"Patient/{pid}"},
+                "performedDateTime": day_iso[d],
+                "code": {"coding": [{"system": "placeholder-proc", "code": "stress_test_or_echo"}]},
+                "status": "completed",
+            }
+        )
+
+    fhir_chunks = {resource: b"".join(orjson.dumps(r) + b"\n" for r in rows) for resource, rows in resource_rows.items()}
+    return imaging_row, risk_row, wearable_bytes, fhir_chunks
+
+
+def generate_synthetic_data(
+    seed: int = 42,
+    data_path: str | None = None,
+    days: int = 180,
+    output_root: str | Path = "data/synth",
+    workers: int | None = None,
+) -> dict[str, Path]:
     X, y, patient_ids = load_uci_dataset(data_path)
     root = Path(output_root)
     fhir_root = root / "fhir_ndjson"
@@ -57,131 +280,36 @@ def generate_synthetic_data(seed: int = 42, data_path: str | None = None, days:
     fhir_root.mkdir(parents=True, exist_ok=True)
     wearable_root.mkdir(parents=True, exist_ok=True)
 
-    resource_rows: dict[str, list[dict[str, Any]]] = {r: [] for r in ["Encounter", "Condition", "MedicationRequest", "Observation", "Procedure"]}
     imaging_rows: list[dict[str, Any]] = []
     risk_rows: list[dict[str, Any]] = []
     now = datetime.now(UTC).replace(hour=12, minute=0, second=0, microsecond=0)
 
-    for idx, (pid, feat, label) in enumerate(zip(patient_ids, X, y)):
-        rng = random.Random(seed * 10_000 + idx)
-        base = _base_metrics(feat, label, rng)
-
-        imaging_rows.append(
-            {
-                "patient_id": pid,
-                "lvef": round(_clamp(65 - base["risk"] * 28 + rng.uniform(-5, 4), 20, 75), 1),
-                "lvedv": round(_clamp(110 + base["risk"] * 55 + rng.uniform(-12, 12), 65, 260), 1),
-                "lvesv": round(_clamp(45 + base["risk"] * 40 + rng.uniform(-9, 10), 20, 180), 1),
-                "wall_thickness": round(_clamp(9 + base["risk"] * 5 + rng.uniform(-1.2, 1.2), 6, 18), 2),
-                "cac_score_proxy": int(_clamp(base["risk"] * 280 + rng.uniform(0, 140), 0, 700)),
-            }
-        )
-
-        risk_rows.append(
-            {
-                "patient_id": pid,
-                "apoe4_carrier": int(rng.random() < (0.1 + 0.2 * base["risk"])),
-                "family_history_cvd": int(rng.random() < (0.2 + 0.5 * base["risk"])),
-                "polygenic_risk_decile": int(_clamp(round(base["risk"] * 10 + rng.uniform(-1, 1)), 1, 10)),
-            }
-        )
+    tasks = [
+        (idx, pid, feat, label, seed, days)
+        for idx, (pid, feat, label) in enumerate(zip(patient_ids, X, y))
+    ]
+    # Patients are independent (each has its own seeded generator), so fan them out
+    # across processes; imap keeps results in patient order for deterministic output.
+    # All files are written here, in result order: duplicate feature rows share a
+    # patient ID, and the last one must win as in a serial run.
+    with ExitStack() as stack:
+        fhir_files = {
+            resource: stack.enter_context((fhir_root / f"{resource.lower()}.ndjson").open("wb", buffering=WRITE_BUFFER_BYTES))
+            for resource in RESOURCE_TYPES
+        }
+        pool = stack.enter_context(Pool(processes=workers))
+        generate = partial(_generate_patient, _build_calendar(now, days))
+        for pid, (imaging_row, risk_row, wearable_bytes, fhir_chunks) in zip(
+            patient_ids, pool.imap(generate, tasks, chunksize=16)
+        ):
+            (wearable_root / f"{pid}.parquet").write_bytes(wearable_bytes)
+            imaging_rows.append(imaging_row)
+            risk_rows.append(risk_row)
+            for resource, chunk in fhir_chunks.items():
+                fhir_files[resource].write(chunk)
 
-        wearable_rows: list[dict[str, Any]] = []
-        for day_offset in range(days):
-            day = now - timedelta(days=(days - 1 - day_offset))
-            circadian = 1.0 + 0.12 * (1 if day.weekday() < 5 else -1)
-            missing_day = rng.random() < 0.08
-            hr = _clamp(base["hr"] * circadian + rng.uniform(-7, 7), 40, 160)
-            sbp = _clamp(base["sbp"] + rng.uniform(-10, 10), 85, 220)
-            dbp = _clamp(base["dbp"] + rng.uniform(-8, 8), 45, 140)
-            steps = _clamp(base["steps"] * (0.75 + 0.35 * rng.random()) * (0.9 if day.weekday() > 4 else 1.0), 0, 25000)
-            sleep_h = _clamp(base["sleep_h"] + rng.uniform(-1.2, 1.0), 3.5, 10.5)
-            sleep_eff = _clamp(0.88 - base["risk"] * 0.13 + rng.uniform(-0.08, 0.05), 0.55, 0.98)
-
-            wearable_rows.append(
-                {
-                    "patient_id": pid,
-                    "timestamp": day.isoformat(),
-                    "hr": None if missing_day and rng.random() < 0.5 else round(hr, 1),
-                    "sbp": None if missing_day and rng.random() < 0.6 else round(sbp, 1),
-                    "dbp": None if missing_day and rng.random() < 0.6 else round(dbp, 1),
-                    "steps": None if missing_day else int(steps),
-                    "sleep_duration_h": None if missing_day and rng.random() < 0.5 else round(sleep_h, 2),
-                    "sleep_efficiency": None if missing_day and rng.random() < 0.5 else round(sleep_eff, 3),
-                }
-            )
-
-            if rng.random() < (0.03 + base["risk"] * 0.08):
-                resource_rows["Encounter"].append(
-                    {
-                        "resourceType": "Encounter",
-                        "id": f"enc-{pid}-{day.date()}",
-                        "subject": {"reference": f"Patient/{pid}"},
-                        "period": {"start": day.isoformat()},
-                        "class": {"code": "outpatient" if rng.random() < 0.8 else "emergency"},
-                    }
-                )
-
-            if day_offset % 30 == 0 or rng.random() < 0.04:
-                resource_rows["Observation"].append(
-                    {
-                        "resourceType": "Observation",
-                        "id": f"obs-{pid}-{day.date()}",
-                        "subject": {"reference": f"Patient/{pid}"},
-                        "effectiveDateTime": day.isoformat(),
-                        "code": {"coding": [{"system": "placeholder-lab", "code": "bp_panel"}]},
-                        "component": [
-                            {"code": {"text": "SBP"}, "valueQuantity": {"value": round(sbp, 1)}},
-                            {"code": {"text": "DBP"}, "valueQuantity": {"value": round(dbp, 1)}},
-                            {"code": {"text": "HR"}, "valueQuantity": {"value": round(hr, 1)}},
-                        ],
-                    }
-                )
-
-            if day_offset % 45 == 0 and rng.random() < 0.75:
-                resource_rows["MedicationRequest"].append(
-                    {
-                        "resourceType": "MedicationRequest",
-                        "id": f"med-{pid}-{day.date()}",
-                        "subject": {"reference": f"Patient/{pid}"},
-                        "authoredOn": day.isoformat(),
-                        "medicationCodeableConcept": {"coding": [{"system": "placeholder-rx", "code": "statin_or_bp_agent"}]},
-                        "status": "active",
-                    }
-                )
-
-            if day_offset % 60 == 0 and rng.random() < (0.35 + base["risk"] * 0.4):
-                resource_rows["Condition"].append(
-                    {
-                        "resourceType": "Condition",
-                        "id": f"cond-{pid}-{day.date()}",
-                        "subject": {"reference": f"Patient/{pid}"},
-                        "recordedDate": day.isoformat(),
-                        "code": {"coding": [{"system": "placeholder-cond", "code": "cvd_risk_state"}]},
-                        "clinicalStatus": {"text": "active"},
-                    }
-                )
-
-            if day_offset % 90 == 0 and rng.random() < (0.2 + base["risk"] * 0.3):
-                resource_rows["Procedure"].append(
-                    {
-                        "resourceType": "Procedure",
-                        "id": f"proc-{pid}-{day.date()}",
-                        "subject": {"reference": f"Patient/{pid}"},
-                        "performedDateTime": day.isoformat(),
-                        "code": {"coding": [{"system": "placeholder-proc", "code": "stress_test_or_echo"}]},
-                        "status": "completed",
-                    }
-                )
-
-        _write_json_records(wearable_root / f"{pid}.parquet", wearable_rows)
-
-    for resource, rows in resource_rows.items():
-        out = fhir_root / f"{resource.lower()}.ndjson"
-        out.write_text("\n".join(json.dumps(r) for r in rows), encoding="utf-8")
-
-    _write_json_records(root / "imaging_features.parquet", imaging_rows)
-    _write_json_records(root / "risk_factors.parquet", risk_rows)
+    _write_json_records(root / "imaging_features.parquet", imaging_rows, IMAGING_SCHEMA)
+    _write_json_records(root / "risk_factors.parquet", risk_rows, RISK_FACTOR_SCHEMA)
 
     return {
         "fhir_root": fhir_root,
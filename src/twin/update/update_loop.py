@@ -1,27 +1,70 @@
 from __future__ import annotations
 
-import json
-from collections import defaultdict
-from datetime import datetime
+from collections import Counter, defaultdict
+from datetime import date, timedelta
 from pathlib import Path
-from statistics import mean
 from typing import Any
 
-from twin.sim.hemodynamics_stub import simulate_hemodynamics_stub
+import numpy as np
+import orjson
 
+from twin.io import read_records
+from twin.sim.hemodynamics_stub import simulate_hemodynamics_stub_vec
 
-def _read_records(path: str | Path) -> list[dict[str, Any]]:
-    return json.loads(Path(path).read_text(encoding="utf-8"))["rows"]
+SERIES_KEYS = ("hr", "sbp", "dbp", "steps")
+# The timestamp field of each FHIR NDJSON file; None marks Encounter's period.start.
+FHIR_DATE_FIELDS: dict[str, str | None] = {
+    "encounter": None,
+    "condition": "recordedDate",
+    "medicationrequest": "authoredOn",
+    "observation": "effectiveDateTime",
+    "procedure": "performedDateTime",
+}
+
+
+def _window_mean(window: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """Row-wise mean over non-missing values (0.0 where none) and the count used."""
+    counts = np.count_nonzero(~np.isnan(window), axis=1)
+    totals = np.nansum(window, axis=1)
+    return np.divide(totals, counts, out=np.zeros_like(totals), where=counts > 0), counts
+
+
+def _window_trend(window: np.ndarray) -> np.ndarray:
+    """Row-wise last minus first non-missing value; 0.0 with fewer than two values."""
+    valid = ~np.isnan(window)
+    first = valid.argmax(axis=1)
+    last = window.shape[1] - 1 - valid[:, ::-1].argmax(axis=1)
+    rows = np.arange(window.shape[0])
+    trend = window[rows, last] - window[rows, first]
+    return np.where(np.count_nonzero(valid, axis=1) > 1, trend, 0.0)
+
+
+def _is_chronological(rows: list[dict[str, Any]]) -> bool:
+    return all(a["timestamp"] <= b["timestamp"] for a, b in zip(rows, rows[1:]))
+
+
+def _date_grid(dates_per_pid: dict[str, list[str]]) -> list[str]:
+    """Sorted union of every patient's dates.
+
+    Synthetic cohorts share one contiguous calendar, so when any patient covers the
+    whole first-to-last range the grid is built from the endpoints alone.
+    """
+    if not dates_per_pid:
+        return []
+    first = min(dates[0] for dates in dates_per_pid.values())
+    last = max(dates[-1] for dates in dates_per_pid.values())
+    start, end = date.fromisoformat(first), date.fromisoformat(last)
+    span = (end - start).days + 1
+    for dates in dates_per_pid.values():
+        if len(dates) == span and dates[0] == first and dates[-1] == last and len(set(dates)) == span:
+            return [(start + timedelta(days=i)).isoformat() for i in range(span)]
+    return sorted(set().union(*dates_per_pid.values()))
 
 
 def _load_ndjson(path: Path) -> list[dict[str, Any]]:
     if not path.exists():
         return []
-    rows = []
-    for line in path.read_text(encoding="utf-8").splitlines():
-        if line.strip():
-            rows.append(json.loads(line))
-    return rows
+    return [orjson.loads(line) for line in path.read_bytes().splitlines() if line.strip()]
 
 
 def run_update_loop(
@@ -35,86 +78,115 @@ def run_update_loop(
     state_root.mkdir(parents=True, exist_ok=True)
 
     wearable_by_patient: dict[str, list[dict[str, Any]]] = {}
+    dates_per_pid: dict[str, list[str]] = {}
     for w_file in (root / "wearables").glob("*.parquet"):
-        rows = sorted(_read_records(w_file), key=lambda r: r["timestamp"])
+        # The generator writes each file in timestamp order; only sort files that aren't.
+        rows = read_records(w_file)
+        if not _is_chronological(rows):
+            rows.sort(key=lambda r: r["timestamp"])
         if rows:
-            wearable_by_patient[rows[0]["patient_id"]] = rows
+            pid = rows[0]["patient_id"]
+            wearable_by_patient[pid] = rows
+            dates_per_pid[pid] = [r["timestamp"][:10] for r in rows]
 
-    imaging = {r["patient_id"]: r for r in _read_records(root / "imaging_features.parquet")}
+    imaging = {r["patient_id"]: r for r in read_records(root / "imaging_features.parquet")}
 
-    events_by_day: dict[str, dict[str, int]] = defaultdict(lambda: defaultdict(int))
-    for resource in ["encounter", "condition", "medicationrequest", "observation", "procedure"]:
+    event_counts_by_key: Counter[tuple[str, str]] = Counter()
+    for resource, date_field in FHIR_DATE_FIELDS.items():
         for event in _load_ndjson(root / "fhir_ndjson" / f"{resource}.ndjson"):
-            key = event.get("period", {}).get("start") or event.get("effectiveDateTime") or event.get("authoredOn") or event.get("recordedDate") or event.get("performedDateTime")
+            key = event.get("period", {}).get("start") if date_field is None else event.get(date_field)
             if key:
-                events_by_day[key[:10]][event["resourceType"]] += 1
+                event_counts_by_key[(key[:10], event["resourceType"])] += 1
+    events_by_day: dict[str, dict[str, int]] = defaultdict(dict)
+    for (day, resource_type), count in event_counts_by_key.items():
+        events_by_day[day][resource_type] = count
 
-    all_dates = sorted({r["timestamp"][:10] for rows in wearable_by_patient.values() for r in rows})
+    all_dates = _date_grid(dates_per_pid)
     if not all_dates:
         return []
     dates = all_dates[-days:]
+    first_day = len(all_dates) - len(dates)
+
+    # Stack every patient onto the shared date grid as (patients x dates) float64
+    # matrices, NaN where a value (or the whole day) is missing, so each day is a
+    # handful of column-window reductions over all patients at once.
+    pids = list(wearable_by_patient)
+    date_col = {d: j for j, d in enumerate(all_dates)}
+    grid = {key: np.full((len(pids), len(all_dates)), np.nan) for key in SERIES_KEYS}
+    has_row = np.zeros((len(pids), len(all_dates)), dtype=bool)
+    for p, pid in enumerate(pids):
+        rows = wearable_by_patient[pid]
+        cols = [date_col[d] for d in dates_per_pid[pid]]
+        has_row[p, cols] = True
+        for key in SERIES_KEYS:
+            grid[key][p, cols] = np.array([r[key] for r in rows], dtype=np.float64)
+    lvef = np.array([float(imaging.get(pid, {}).get("lvef", 55.0)) for pid in pids])
 
     snapshots: list[Path] = []
     calibration_offset = 0.0
 
     for i, day in enumerate(dates):
         out_file = state_root / f"state_{day}.jsonl"
-        lines: list[str] = []
-
-        day_risks = []
-        for pid, rows in wearable_by_patient.items():
-            history = [r for r in rows if r["timestamp"][:10] <= day]
-            last14 = history[-14:]
-            today = next((r for r in history if r["timestamp"][:10] == day), None)
-            if not last14 or today is None:
-                continue
-
-            hr_vals = [r["hr"] for r in last14 if r["hr"] is not None]
-            sbp_vals = [r["sbp"] for r in last14 if r["sbp"] is not None]
-            dbp_vals = [r["dbp"] for r in last14 if r["dbp"] is not None]
-            step_vals = [r["steps"] for r in last14 if r["steps"] is not None]
-
-            if not hr_vals or not sbp_vals or not dbp_vals:
-                continue
-
-            hr_mean = mean(hr_vals)
-            sbp_mean = mean(sbp_vals)
-            dbp_mean = mean(dbp_vals)
-            steps_mean = mean(step_vals) if step_vals else 0.0
-            bp_trend = sbp_vals[-1] - sbp_vals[0] if len(sbp_vals) > 1 else 0.0
-            activity_trend = step_vals[-1] - step_vals[0] if len(step_vals) > 1 else 0.0
-
-            hemo = simulate_hemodynamics_stub(float(imaging.get(pid, {}).get("lvef", 55.0)), hr_mean, sbp_mean, dbp_mean)
-            risk = 0.25 + (sbp_mean - 120) * 0.004 + (hr_mean - 70) * 0.003 - (steps_mean - 7000) / 100000
-            risk += max(0.0, bp_trend) * 0.001 + calibration_offset
-            risk = max(0.01, min(0.99, risk))
-
-            event_counts = events_by_day.get(day, {})
-            snapshot = {
+        j = first_day + i
+        window = slice(max(0, j - 13), j + 1)
+
+        (hr_mean, hr_n), (sbp_mean, sbp_n), (dbp_mean, dbp_n), (steps_mean, steps_n) = (
+            _window_mean(grid[key][:, window]) for key in SERIES_KEYS
+        )
+        bp_trend = _window_trend(grid["sbp"][:, window])
+        activity_trend = _window_trend(grid["steps"][:, window])
+
+        risk = 0.25 + (sbp_mean - 120) * 0.004 + (hr_mean - 70) * 0.003 - (steps_mean - 7000) / 100000
+        risk += np.maximum(0.0, bp_trend) * 0.001 + calibration_offset
+        risk = np.clip(risk, 0.01, 0.99)
+        hemo = simulate_hemodynamics_stub_vec(lvef, hr_mean, sbp_mean, dbp_mean)
+        map_est, compliance, strain = hemo["map_estimate"], hemo["compliance_proxy"], hemo["cardiac_strain_proxy"]
+
+        active = np.flatnonzero(has_row[:, j] & (hr_n > 0) & (sbp_n > 0) & (dbp_n > 0))
+        # Shared read-only per day; orjson serializes the same dict into every snapshot.
+        event_counts = events_by_day.get(day, {})
+        columns = zip(
+            [pids[p] for p in active.tolist()],
+            np.round(risk[active], 5).tolist(),
+            np.round(bp_trend[active], 4).tolist(),
+            # Step counts are integers, so their trend stays an int step difference.
+            [int(t) if n > 1 else 0.0 for t, n in zip(activity_trend[active].tolist(), steps_n[active].tolist())],
+            np.round((hr_mean[active] - 70.0) / 70.0, 5).tolist(),
+            np.round(np.abs(risk[active] - 0.5), 5).tolist(),
+            np.round(map_est[active], 3).tolist(),
+            np.round(compliance[active], 5).tolist(),
+            np.round(strain[active], 5).tolist(),
+        )
+        day_snapshots: list[dict[str, Any]] = [
+            {
                 "patient_id": pid,
                 "date": day,
-                "risk": round(risk, 5),
-                "bp_trend": round(bp_trend, 4),
-                "activity_trend": round(activity_trend, 4),
-                "events_today": dict(event_counts),
-                "rolling_mean_shift": round((hr_mean - 70.0) / 70.0, 5),
-                "calibration_drift": round(abs(risk - 0.5), 5),
+                "risk": risk_v,
+                "bp_trend": bp_trend_v,
+                "activity_trend": activity_trend_v,
+                "events_today": event_counts,
+                "rolling_mean_shift": shift_v,
+                "calibration_drift": drift_v,
                 "recalibrated": False,
-                "hemodynamics_stub": hemo,
+                "hemodynamics_stub": {
+                    "map_estimate": map_v,
+                    "compliance_proxy": compliance_v,
+                    "cardiac_strain_proxy": strain_v,
+                },
             }
-            lines.append(json.dumps(snapshot, sort_keys=True))
-            day_risks.append(risk)
+            for pid, risk_v, bp_trend_v, activity_trend_v, shift_v, drift_v, map_v, compliance_v, strain_v in columns
+        ]
 
-        if recalibrate_weekly and i > 0 and i % 7 == 0 and day_risks:
-            avg_risk = mean(day_risks)
+        if recalibrate_weekly and i > 0 and i % 7 == 0 and active.size:
+            avg_risk = float(risk[active].mean())
             if abs(avg_risk - 0.5) > 0.07:
                 calibration_offset += (0.5 - avg_risk) * 0.3
-                lines = [
-                    json.dumps({**json.loads(line), "recalibrated": True}, sort_keys=True)
-                    for line in lines
-                ]
+                for snapshot in day_snapshots:
+                    snapshot["recalibrated"] = True
 
-        out_file.write_text("\n".join(lines), encoding="utf-8")
+        # Encode once, after the recalibration decision for the day is known.
+        with out_file.open("wb", buffering=1 << 20) as f:
+            f.write(b"\n".join(orjson.dumps(snapshot, option=orjson.OPT_SORT_KEYS) for snapshot in day_snapshots))
         snapshots.append(out_file)
 
     return snapshots
@@ -3,8 +3,10 @@ from __future__ import annotations
 import argparse
 import importlib.util
 import sys
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 
+import numpy as np
 import pandas as pd
 
 CPS_STATE_TYPE = "cps_service_state"
@@ -17,10 +19,6 @@ SCENARIO_IMPACT = {
 }
 
 
-def filter_to_test(events: list[dict]) -> list[dict]:
-    return [e for e in events if e.get("phase") == "test"]
-
-
 def compute_cps_metrics(events: list[dict], service: str = "traffic"):
     cps_states = [
         e
@@ -28,21 +26,14 @@ def compute_cps_metrics(events: list[dict], service: str = "traffic"):
         if e.get("event_type") == CPS_STATE_TYPE and isinstance(e.get("meta"), dict) and e["meta"].get("service") == service
     ]
     cps_states.sort(key=lambda x: int(x.get("step", 0)))
-    degraded_flags = [bool(e.get("meta", {}).get("degraded", False)) for e in cps_states]
-    sdp = 1.0 if any(degraded_flags) else 0.0
-
-    durations = []
-    run_len = 0
-    for d in degraded_flags:
-        if d:
-            run_len += 1
-        elif run_len > 0:
-            durations.append(run_len)
-            run_len = 0
-    if run_len > 0:
-        durations.append(run_len)
-
-    avg_dur = float(sum(durations) / len(durations)) if durations else 0.0
+    flags = np.fromiter((bool(e.get("meta", {}).get("degraded", False)) for e in cps_states), dtype=bool, count=len(cps_states))
+    sdp = float(flags.any())
+
+    # Degraded episodes are the spans between rising and falling edges of the flags.
+    edges = np.diff(np.r_[False, flags, False].astype(np.int8))
+    durations = np.flatnonzero(edges == -1) - np.flatnonzero(edges == 1)
+
+    avg_dur = float(durations.mean()) if durations.size else 0.0
     severity_by_actor: dict[int, float] = {}
     for e in cps_states:
         meta = e.get("meta", {})
@@ -62,15 +53,42 @@ def compute_cps_metrics(events: list[dict], service: str = "traffic"):
 
 
 def eval_from_events(events: list[dict]) -> dict:
-    events = filter_to_test(events)
-    actors = sorted({int(e["actor_id"]) for e in events if "actor_id" in e and int(e["actor_id"]) >= 0})
-    scenario_by_actor = {}
+    # Single fused pass over the TEST-phase events.
+    actors: set[int] = set()
+    malicious: set[int] = set()
+    confirmed: set[int] = set()
+    scenario_by_actor: dict[int, str] = {}
+    first_mal_step: dict[int, int] = {}
+    first_conf_step: dict[int, int] = {}
+    cps_events: list[dict] = []
+    last_test_step = None
+    # Hot loop: bind builtins and each event's .get to locals.
+    _int = int
     for e in events:
-        if e.get("actor_id") is not None and int(e["actor_id"]) >= 0 and e.get("scenario"):
-            scenario_by_actor[int(e["actor_id"])] = e.get("scenario")
-
-    malicious = {int(e["actor_id"]) for e in events if e.get("label") == "malicious" and int(e.get("actor_id", -1)) >= 0}
-    confirmed = {int(e["actor_id"]) for e in events if e.get("event_type") == "alert_confirmed" and int(e.get("actor_id", -1)) >= 0}
+        get = e.get
+        if get("phase") != "test":
+            continue
+        step = _int(get("step", 0))
+        if last_test_step is None or step > last_test_step:
+            last_test_step = step
+        event_type = get("event_type")
+        if event_type == CPS_STATE_TYPE:
+            cps_events.append(e)
+        aid = _int(get("actor_id", -1))
+        if aid < 0:
+            continue
+        actors.add(aid)
+        scenario = get("scenario")
+        if scenario:
+            scenario_by_actor[aid] = scenario
+        if get("label") == "malicious":
+            malicious.add(aid)
+            first_mal_step.setdefault(aid, step)
+        if event_type == "alert_confirmed":
+            confirmed.add(aid)
+            first_conf_step.setdefault(aid, step)
+    if last_test_step is None:
+        last_test_step = 0
 
     tp = len(malicious & confirmed)
     fp = len(confirmed - malicious)
@@ -79,32 +97,23 @@ def eval_from_events(events: list[dict]) -> dict:
     rec = tp / (tp + fn) if tp + fn else 0.0
     actor_f1 = 2 * prec * rec / (prec + rec) if prec + rec else 0.0
 
-    first_mal_step = {}
-    first_conf_step = {}
-    for e in events:
-        aid = int(e.get("actor_id", -1))
-        if aid < 0:
-            continue
-        if e.get("label") == "malicious":
-            first_mal_step.setdefault(aid, int(e.get("step", 0)))
-        if e.get("event_type") == "alert_confirmed":
-            first_conf_step.setdefault(aid, int(e.get("step", 0)))
-
     ttd_values = [first_conf_step[a] - first_mal_step[a] for a in malicious if a in first_conf_step and a in first_mal_step]
     mean_ttd = sum(ttd_values) / len(ttd_values) if ttd_values else None
 
-    last_test_step = max([int(e.get("step", 0)) for e in events], default=0)
-    cps_sdp, avg_dur, severity_by_actor = compute_cps_metrics(events, service="traffic")
+    cps_sdp, avg_dur, severity_by_actor = compute_cps_metrics(cps_events, service="traffic")
 
     iw_num = 0.0
     iw_den = 0.0
+    scenario_impact = SCENARIO_IMPACT.get
     for a in malicious:
-        if a not in first_mal_step:
+        first_mal = first_mal_step.get(a)
+        if first_mal is None:
             continue
-        ttd_i = first_conf_step[a] - first_mal_step[a] if a in first_conf_step else last_test_step - first_mal_step[a]
+        first_conf = first_conf_step.get(a)
+        ttd_i = (first_conf if first_conf is not None else last_test_step) - first_mal
         w_i = severity_by_actor.get(a)
         if w_i is None:
-            w_i = SCENARIO_IMPACT.get(scenario_by_actor.get(a, ""), 0.5)
+            w_i = scenario_impact(scenario_by_actor.get(a, ""), 0.5)
         iw_num += w_i * ttd_i
         iw_den += w_i
     iw_ttd = iw_num / iw_den if iw_den > 0 else None
@@ -131,19 +140,37 @@ def load_model(path: str):
     return module
 
 
+_worker_module = None
+_worker_steps: tuple[int, int] = (0, 0)
+
+
+def _init_worker(model_path: str, warmup_steps: int, test_steps: int) -> None:
+    global _worker_module, _worker_steps
+    _worker_module = load_model(model_path)
+    _worker_steps = (warmup_steps, test_steps)
+
+
+def _run_one(task: tuple[int, int]) -> dict:
+    threshold, seed = task
+    warmup_steps, test_steps = _worker_steps
+    events = _worker_module.run_simulation(
+        seed=seed,
+        warmup_steps=warmup_steps,
+        test_steps=test_steps,
+        threshold=threshold,
+    )
+    return {"threshold": threshold, "seed": seed, **eval_from_events(events)}
+
+
 def run_sweep(args):
-    module = load_model(args.model)
-    rows = []
-    for threshold in range(args.threshold_min, args.threshold_max + 1):
-        for seed in range(args.seeds):
-            events = module.run_simulation(
-                seed=seed,
-                warmup_steps=args.warmup_steps,
-                test_steps=args.test_steps,
-                threshold=threshold,
-            )
-            metrics = eval_from_events(events)
-            rows.append({"threshold": threshold, "seed": seed, **metrics})
+    tasks = [(t, s) for t in range(args.threshold_min, args.threshold_max + 1) for s in range(args.seeds)]
+    # Each (threshold, seed) run is independent; the model is loaded once per worker.
+    with ProcessPoolExecutor(
+        max_workers=getattr(args, "workers", None),
+        initializer=_init_worker,
+        initargs=(args.model, args.warmup_steps, args.test_steps),
+    ) as ex:
+        rows = list(ex.map(_run_one, tasks, chunksize=1))
 
     df = pd.DataFrame(rows)
     summary = (
@@ -171,6 +198,7 @@ def main():
     parser.add_argument("--test_steps", type=int, default=240)
     parser.add_argument("--threshold_min", type=int, default=3)
     parser.add_argument("--threshold_max", type=int, default=7)
+    parser.add_argument("--workers", type=int, default=None)
     args = parser.parse_args()
 
     run_sweep(args)
@@ -0,0 +1,23 @@
+from __future__ import annotations
+
+import numpy as np
+
+from twin.models.baseline import _auprc, _auroc
+
+
+def test_ranking_metrics_match_known_values():
+    y = np.array([1, 0, 1, 0, 1], dtype=np.float64)
+    p = np.array([0.9, 0.8, 0.7, 0.3, 0.1])
+
+    # 3 of the 6 positive/negative pairs are ordered correctly.
+    assert _auroc(y, p) == 3 / 6
+    # Precision at each recall step: 1/1, 2/3, 3/5.
+    assert np.isclose(_auprc(y, p), (1.0 + 2 / 3 + 3 / 5) / 3)
+
+
+def test_auroc_averages_tied_scores():
+    y = np.array([1, 0, 1, 0], dtype=np.float64)
+    p = np.array([0.5, 0.5, 0.5, 0.5])
+
+    assert _auroc(y, p) == 0.5
+    assert _auroc(np.ones(3), np.array([0.1, 0.2, 0.3])) == 0.0
@@ -0,0 +1,26 @@
+from __future__ import annotations
+
+import json
+
+from twin.io import read_records, write_records
+
+
+def test_parquet_round_trip_with_column_pruning(tmp_path):
+    rows = [
+        {"patient_id": "pid_a", "age": 63.0, "sex": "Male", "target": 1},
+        {"patient_id": "pid_b", "age": 41.0, "sex": "Female", "target": 0},
+    ]
+    out = write_records(tmp_path / "cohort.parquet", rows)
+
+    assert out.read_bytes()[:4] == b"PAR1"
+    assert read_records(out) == rows
+    assert read_records(out, columns=["patient_id"]) == [{"patient_id": "pid_a"}, {"patient_id": "pid_b"}]
+
+
+def test_legacy_json_records_still_load(tmp_path):
+    rows = [{"patient_id": "pid_a", "hr": 71.5}, {"patient_id": "pid_b", "hr": None}]
+    legacy = tmp_path / "legacy.parquet"
+    legacy.write_text(json.dumps({"schema": {"patient_id": "str", "hr": "float"}, "rows": rows}), encoding="utf-8")
+
+    assert read_records(legacy) == rows
+    assert read_records(legacy, columns=["hr"]) == [{"hr": 71.5}, {"hr": None}]
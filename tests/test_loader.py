@@ -31,3 +31,20 @@ def test_patient_id_is_deterministic(tmp_path):
     _, _, pids_b = load_uci_dataset(str(csv_file))
 
     assert pids_a == pids_b
+
+
+def test_short_first_row_keeps_header_columns(tmp_path):
+    csv_file = tmp_path / "mini.csv"
+    csv_file.write_text(
+        "num,age,chol,sex\n"
+        "0,63,233\n"
+        "1,50,250,Male\n"
+        "0,41,204,Male\n",
+        encoding="utf-8",
+    )
+
+    X, y, _ = load_uci_dataset(str(csv_file))
+
+    assert all(list(row.keys()) == ["age", "chol", "sex"] for row in X)
+    assert X[0]["sex"] == "Male"
+    assert y == [0, 1, 0]
@@ -4,6 +4,7 @@ import json
 from pathlib import Path
 
 from twin.features.aggregate_synth_features import aggregate_synth_features
+from twin.io import read_records
 from twin.synth.generate import generate_synthetic_data
 from twin.update.update_loop import run_update_loop
 
@@ -50,7 +51,7 @@ def test_synth_schemas_and_aggregation(tmp_path, monkeypatch):
         _read_rows(wearable_files[0])[0]
     )
 
-    merged_rows = _read_rows(merged)
+    merged_rows = read_records(merged)
     assert merged_rows and "wearable_hr_mean" in merged_rows[0]
 
 
@@ -72,3 +73,23 @@ def test_update_loop_writes_valid_jsonl(tmp_path, monkeypatch):
     assert lines
     row = json.loads(lines[0])
     assert {"patient_id", "date", "risk", "bp_trend", "activity_trend", "hemodynamics_stub"}.issubset(row)
+
+
+def test_duplicate_patients_write_wearables_like_a_serial_run(tmp_path):
+    src = Path(__file__).resolve().parents[1] / "heart_disease_uci.csv"
+    header, *records = src.read_text(encoding="utf-8").splitlines()
+    records = records[:64]
+    # Identical feature rows share a patient ID; spread the copies across pool chunks.
+    for i in (16, 32, 48):
+        records[i] = records[0]
+    csv_path = tmp_path / "dupes.csv"
+    csv_path.write_text("\n".join([header, *records]) + "\n", encoding="utf-8")
+
+    serial = generate_synthetic_data(seed=5, data_path=str(csv_path), days=2000, output_root=tmp_path / "serial", workers=1)
+    pooled = generate_synthetic_data(seed=5, data_path=str(csv_path), days=2000, output_root=tmp_path / "pooled", workers=4)
+
+    serial_files = sorted(serial["wearables"].glob("*.parquet"))
+    assert [p.name for p in serial_files] == sorted(p.name for p in pooled["wearables"].glob("*.parquet"))
+    for path in serial_files:
+        assert (pooled["wearables"] / path.name).read_bytes() == path.read_bytes()
+        _read_rows(path)
@@ -0,0 +1,82 @@
+from __future__ import annotations
+
+import json
+from pathlib import Path
+
+import pytest
+
+from twin.update.update_loop import _date_grid, run_update_loop
+
+
+def _write_rows(path: Path, rows: list[dict]) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps({"schema": {}, "rows": rows}), encoding="utf-8")
+
+
+def _wearable(pid: str, day: str, hr, sbp, dbp, steps) -> dict:
+    return {"patient_id": pid, "timestamp": f"{day}T12:00:00+00:00", "hr": hr, "sbp": sbp, "dbp": dbp, "steps": steps}
+
+
+def _snapshots(state_root: Path, pid: str) -> dict[str, dict]:
+    out = {}
+    for path in state_root.glob("state_*.jsonl"):
+        for line in path.read_text(encoding="utf-8").splitlines():
+            row = json.loads(line)
+            if row["patient_id"] == pid:
+                out[row["date"]] = row
+    return out
+
+
+def test_update_loop_windows_span_grid_days_and_skip_missing(tmp_path):
+    synth = tmp_path / "synth"
+    # pid_b reports every day, so pid_a's gap (Jan 4-17) stays on the shared date grid.
+    _write_rows(
+        synth / "wearables" / "pid_a.parquet",
+        [
+            _wearable("pid_a", "2024-01-01", 70.0, 120.0, 80.0, 5000),
+            _wearable("pid_a", "2024-01-02", 80.0, None, 85.0, None),
+            _wearable("pid_a", "2024-01-03", 75.0, 130.0, 85.0, 7000),
+            _wearable("pid_a", "2024-01-18", 90.0, 140.0, 90.0, None),
+        ],
+    )
+    _write_rows(
+        synth / "wearables" / "pid_b.parquet",
+        [_wearable("pid_b", f"2024-01-{d:02d}", 65.0, 118.0, 76.0, 8000) for d in range(1, 19)],
+    )
+    _write_rows(synth / "imaging_features.parquet", [{"patient_id": "pid_a", "lvef": 55.0}])
+
+    state_root = tmp_path / "state"
+    run_update_loop(synth_root=synth, output_root=state_root, days=18, recalibrate_weekly=False)
+    snaps = _snapshots(state_root, "pid_a")
+
+    assert sorted(snaps) == ["2024-01-01", "2024-01-02", "2024-01-03", "2024-01-18"]
+
+    # Trends run from the first to the last non-missing value in the window.
+    jan3 = snaps["2024-01-03"]
+    assert jan3["bp_trend"] == pytest.approx(10.0)
+    assert jan3["activity_trend"] == 2000
+    assert jan3["risk"] == pytest.approx(0.25 + 5 * 0.004 + 5 * 0.003 + 1000 / 100000 + 10 * 0.001)
+
+    # The Jan 18 window covers Jan 5-18 only, so it holds a single reading and no steps.
+    jan18 = snaps["2024-01-18"]
+    assert jan18["bp_trend"] == 0.0
+    assert jan18["activity_trend"] == 0.0
+    assert jan18["risk"] == pytest.approx(0.25 + 20 * 0.004 + 20 * 0.003 + 7000 / 100000)
+
+
+def test_date_grid_falls_back_to_union_without_a_full_coverage_patient():
+    dates_per_pid = {
+        "pid_a": ["2024-01-01", "2024-01-02", "2024-01-05"],
+        "pid_b": ["2024-01-02", "2024-01-07"],
+    }
+
+    assert _date_grid(dates_per_pid) == ["2024-01-01", "2024-01-02", "2024-01-05", "2024-01-07"]
+
+
+def test_date_grid_uses_full_calendar_when_a_patient_covers_it():
+    dates_per_pid = {
+        "pid_a": ["2024-01-30", "2024-01-31", "2024-02-01"],
+        "pid_b": ["2024-01-31"],
+    }
+
+    assert _date_grid(dates_per_pid) == ["2024-01-30", "2024-01-31", "2024-02-01"]